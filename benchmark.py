@@ -0,0 +1,138 @@
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+# Modules imported when each app starts, followed by the ones now deferred to the code path that needs them.
+# numpy is not listed as deferred: pandas imports it at startup.
+STARTUP_IMPORTS = ["streamlit", "pandas", "requests", "portfolio", "changefeed", "dedupe", "risk_model", "warmup"]
+DEFERRED_IMPORTS = ["xgboost", "pdfplumber", "PIL.Image"]
+
+# Number of fresh interpreters per measurement; the median is reported
+REPEATS = 3
+
+# Time a single import in a fresh interpreter so nothing is already cached in sys.modules
+def measure_import(module):
+    code = f"import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+    timings = []
+    for _ in range(REPEATS):
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        if result.returncode != 0:
+            return None
+        timings.append(float(result.stdout.strip()))
+    return sorted(timings)[len(timings) // 2]
+
+# Synthetic book size for the customer frame comparison
+BOOK_SIZE = 100_000
+
+# Columns cdd.py projects for the customer list (cdd.LIST_COLUMNS)
+LIST_COLUMNS = ["cid", "first_name", "surname", "residence_country", "customer_type", "occupation", "time_at_address", "income_source"]
+
+# Write a synthetic customers table with every stored column, including the long free-text ones
+def create_customer_book(db_path, rows=BOOK_SIZE):
+    from risk_model import FEATURE_CATEGORIES
+
+    rng = random.Random(42)
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE customers (
+            cid TEXT PRIMARY KEY, first_name TEXT, surname TEXT, residence_country TEXT, customer_type TEXT,
+            occupation TEXT, time_at_address TEXT, street_address TEXT, city TEXT, state TEXT, postal_code TEXT,
+            income_source TEXT, income_comments TEXT, expected_transaction_volume TEXT, file_paths TEXT,
+            descriptions TEXT, created_at TEXT, updated_at TEXT
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO customers VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [(
+            f"{i:08x}", f"First{i}", f"Surname{i}",
+            rng.choice(FEATURE_CATEGORIES["residence_country"]), rng.choice(FEATURE_CATEGORIES["customer_type"]),
+            rng.choice(FEATURE_CATEGORIES["occupation"]), rng.choice(FEATURE_CATEGORIES["time_at_address"]),
+            f"{i} Main Street", "Sydney", "NSW", "2000", rng.choice(FEATURE_CATEGORIES["income_source"]),
+            "Customer claims income from freelance work and occasional consulting. " * 3, "$5,000 - $20,000",
+            f"images/{i:08x}_passport.pdf,images/{i:08x}_income.png",
+            "The image appears to show a passport, which is an official document issued by a government.",
+            "2025-04-20T08:00:00", "2025-04-20T08:00:00"
+        ) for i in range(rows)]
+    )
+    conn.commit()
+    conn.close()
+
+# Compare the old customer frame (SELECT * as object strings, LabelEncoder per feature) with the
+# projected category-dtype frame encoded by risk_model.to_model_frame
+def measure_customer_frame(rows=BOOK_SIZE):
+    import pandas as pd
+    from sklearn.preprocessing import LabelEncoder
+    from risk_model import FEATURE_CATEGORIES, MODEL_FEATURES, to_model_frame
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "book.db")
+        create_customer_book(db_path, rows)
+        conn = sqlite3.connect(db_path)
+
+        start = time.perf_counter()
+        old_df = pd.read_sql_query("SELECT * FROM customers", conn)
+        old_load = time.perf_counter() - start
+        encoders = {col: LabelEncoder().fit(FEATURE_CATEGORIES[col]) for col in MODEL_FEATURES}
+        start = time.perf_counter()
+        X = old_df[MODEL_FEATURES].copy()
+        for col in MODEL_FEATURES:
+            X[col] = encoders[col].transform(X[col])
+        old_encode = time.perf_counter() - start
+
+        start = time.perf_counter()
+        new_df = pd.read_sql_query(f"SELECT {', '.join(LIST_COLUMNS)} FROM customers", conn)
+        new_df = new_df.astype({col: "category" for col in MODEL_FEATURES})
+        new_load = time.perf_counter() - start
+        start = time.perf_counter()
+        to_model_frame(new_df)
+        new_encode = time.perf_counter() - start
+        conn.close()
+
+    return {
+        "SELECT * + LabelEncoder": (old_df.memory_usage(deep=True).sum(), old_load, old_encode),
+        "projected + category": (new_df.memory_usage(deep=True).sum(), new_load, new_encode),
+    }
+
+# Time model training against loading the saved artifact
+def measure_model_load():
+    from risk_model import load_model
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_path = os.path.join(tmp_dir, "risk_model.json")
+        start = time.perf_counter()
+        load_model(model_path)
+        train_time = time.perf_counter() - start
+        start = time.perf_counter()
+        load_model(model_path)
+        artifact_time = time.perf_counter() - start
+    return train_time, artifact_time
+
+if __name__ == "__main__":
+    print("Import time (median of fresh interpreters)")
+    # "all" imports the whole startup set in one interpreter, so shared dependencies are counted once
+    for label, modules in [("startup", STARTUP_IMPORTS + [", ".join(STARTUP_IMPORTS)]), ("deferred", DEFERRED_IMPORTS)]:
+        for module in modules:
+            elapsed = measure_import(module)
+            timing = f"{elapsed * 1000:8.1f} ms" if elapsed is not None else "   not installed"
+            name = "all" if "," in module else module
+            print(f"  {label:<9}{name:<12}{timing}")
+
+    try:
+        print(f"Customer frame ({BOOK_SIZE:,} customers)")
+        for label, (memory, load_time, encode_time) in measure_customer_frame().items():
+            print(f"  {label:<26}{memory / 2**20:8.1f} MiB  load {load_time * 1000:8.1f} ms  encode {encode_time * 1000:8.1f} ms")
+    except ImportError as e:
+        print(f"Customer frame: skipped ({str(e)})")
+
+    try:
+        train_time, artifact_time = measure_model_load()
+        print("Risk model")
+        print(f"  train and save  {train_time * 1000:8.1f} ms")
+        print(f"  load artifact   {artifact_time * 1000:8.1f} ms")
+    except ImportError as e:
+        print(f"Risk model: skipped ({str(e)})")
@@ -1,13 +1,17 @@
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx
 import sqlite3
 import pandas as pd
-import numpy as np
-from sklearn.preprocessing import LabelEncoder
-import xgboost as xgb
-import pdfplumber
 import os
 import requests
 import re
+import threading
+from risk_model import MODEL_VERSION, MODEL_FEATURES, to_model_frame, load_model, predict_risk
+from portfolio import (
+    DIMENSIONS, SCORE_BUCKET_WIDTH, init_portfolio_db, record_customer_scores,
+    update_scores_from_feed, fetch_portfolio_summary
+)
+from warmup import warm_ollama_model
 
 # Database path
 DB_PATH = "bank_onboarding.db"
@@ -15,53 +19,56 @@ DB_PATH = "bank_onboarding.db"
 # Ollama API endpoint
 OLLAMA_API = "http://localhost:11434/api/generate"
 
-# Function to fetch all customers from database
+# Fields needed by the customer list and search (long free-text fields are loaded per customer)
+LIST_COLUMNS = ["cid", "first_name", "surname"] + MODEL_FEATURES
+
+# Function to fetch all customers from database (projected, low-cardinality fields as category dtype)
 def fetch_all_customers():
     conn = sqlite3.connect(DB_PATH)
-    df = pd.read_sql_query("SELECT * FROM customers", conn)
+    df = pd.read_sql_query(f"SELECT {', '.join(LIST_COLUMNS)} FROM customers", conn)
     conn.close()
-    return df
+    return df.astype({col: "category" for col in MODEL_FEATURES})
 
-# Synthetic training data for XGBoost
-def create_synthetic_data():
-    np.random.seed(42)
-    data = {
-        "residence_country": np.random.choice(["Australia (AUS)", "United States (USA)", "China (CHN)", "Russia (RUS)", "Offshore Financial Center (OFF)"], 100),
-        "customer_type": np.random.choice(["Individual", "Company", "Trust", "Partnership"], 100),
-        "occupation": np.random.choice(["Engineer/Technical", "Retail/Cashier", "Government/Political", "Self-employed", "Finance/Banking", "Other/Unknown"], 100),
-        "time_at_address": np.random.choice(["Less than 1 year", "1-3 years", "3-5 years", "More than 5 years"], 100),
-        "income_source": np.random.choice(["Employment", "Business", "Investments", "Inheritance/Gift", "Retirement/Pension", "Other"], 100),
-        "Risk_Score": np.random.uniform(0, 375, 100)
-    }
-    return pd.DataFrame(data)
+# Function to fetch the full record of a single customer
+def fetch_customer_details(cid):
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    row = conn.execute("SELECT * FROM customers WHERE cid = ?", (str(cid),)).fetchone()
+    conn.close()
+    return dict(row) if row else None
 
-# Train XGBoost model
-def train_xgboost():
-    df = create_synthetic_data()
-    X = df.drop("Risk_Score", axis=1)
-    y = df["Risk_Score"]
-    
-    encoders = {}
-    for col in X.columns:
-        encoders[col] = LabelEncoder()
-        X[col] = encoders[col].fit_transform(X[col])
-    
-    model = xgb.XGBRegressor(objective="reg:squarederror", random_state=42)
-    model.fit(X, y)
-    return model, encoders
+# Load the XGBoost model once per process on first use (reused across reruns and sessions)
+@st.cache_resource
+def get_model():
+    return load_model()
+
+# Load the model and the income-assessment LLM in the background
+def warm_up():
+    get_model()
+    warm_ollama_model("granite3.2:latest")
 
-# Predict risk score (XGBoost)
-def predict_risk(customer, model, encoders):
-    X = pd.DataFrame({
-        "residence_country": [customer["residence_country"]],
-        "customer_type": [customer["customer_type"]],
-        "occupation": [customer["occupation"]],
-        "time_at_address": [customer["time_at_address"]],
-        "income_source": [customer["income_source"]]
-    })
-    for col in X.columns:
-        X[col] = encoders[col].transform(X[col])
-    return model.predict(X)[0]
+# Start the in-process warm-up once per worker (opt-in with CDD_WARMUP=1)
+@st.cache_resource
+def start_warm_up():
+    thread = threading.Thread(target=warm_up, name="cdd-warm-up", daemon=True)
+    add_script_run_ctx(thread)
+    thread.start()
+    return thread
+
+# Score only customers that changed since the last run (read from the change feed), updating the aggregates.
+# The model is only loaded when there is something to score. Returns the number scored and, per feature,
+# the values the model does not know (those are scored as missing rather than failing the batch).
+def score_pending_customers():
+    unrecognised = {}
+    def score_customers(customers):
+        X = to_model_frame(pd.DataFrame(customers))
+        for col in MODEL_FEATURES:
+            for customer, missing in zip(customers, X[col].isna()):
+                if missing:
+                    unrecognised.setdefault(col, set()).add(str(customer[col]))
+        scores = get_model().predict(X)
+        return [(score, get_risk_category(score)[0]) for score in scores]
+    return update_scores_from_feed(MODEL_VERSION, score_customers), unrecognised
 
 # Get LLM risk adjustment for income comments
 def get_llm_risk_adjustment(income_comments):
@@ -131,6 +138,7 @@ def extract_text_from_files(file_paths, descriptions):
     for file_path, desc in zip(file_list, desc_list):
         if os.path.exists(file_path) and file_path.endswith(".pdf"):
             try:
+                import pdfplumber  # Deferred: only needed when a customer has PDF documents
                 with pdfplumber.open(file_path) as pdf:
                     text = "\n".join(page.extract_text() or "" for page in pdf.pages)
                     texts.append(f"File: {file_path}\nDescription: {desc}\n{text[:500] + '...' if len(text) > 500 else text}")
@@ -187,8 +195,55 @@ st.markdown("""
 # App header
 st.markdown('<div class="main-header">ABCD Bank - CDD Risk Scoring</div>', unsafe_allow_html=True)
 
-# Train XGBoost model
-xgb_model, encoders = train_xgboost()
+init_portfolio_db()
+
+# Optional warm-up so the first scoring request does not pay for the xgboost import and model load
+if os.environ.get("CDD_WARMUP") == "1":
+    start_warm_up()
+
+# View selection
+view = st.sidebar.radio("View", ["Customer Review", "Portfolio Summary"])
+
+# Portfolio summary (reads only the precomputed aggregates)
+if view == "Portfolio Summary":
+    newly_scored, unrecognised = score_pending_customers()
+    summary = fetch_portfolio_summary()
+    st.markdown('<div class="section-header">Portfolio Risk Summary</div>', unsafe_allow_html=True)
+    if newly_scored:
+        st.caption(f"Scored {newly_scored} new or updated customers")
+    if unrecognised:
+        st.info("Values unknown to the model were scored as missing: " + "; ".join(
+            f"{col.replace('_', ' ')}: {', '.join(sorted(values))}" for col, values in unrecognised.items()
+        ))
+    if summary["total"] == 0:
+        st.warning("No scored customers yet. Please submit data using the onboarding form first.")
+        st.stop()
+
+    category_counts = {}
+    for value, risk_category, count in summary["breakdown"]["residence_country"]:
+        category_counts[risk_category] = category_counts.get(risk_category, 0) + count
+    metric_cols = st.columns(4)
+    metric_cols[0].metric("Customers Scored", summary["total"])
+    for col, risk_category in zip(metric_cols[1:], ["Low Risk", "Medium Risk", "High Risk"]):
+        col.metric(risk_category, category_counts.get(risk_category, 0))
+
+    st.markdown('<div class="section-header">Structured Score Distribution</div>', unsafe_allow_html=True)
+    histogram_df = pd.DataFrame(
+        [(f"{bucket}-{bucket + SCORE_BUCKET_WIDTH}", count) for bucket, count in summary["histogram"]],
+        columns=["Score Range", "Customers"]
+    ).set_index("Score Range")
+    st.bar_chart(histogram_df)
+
+    for dimension in DIMENSIONS:
+        st.markdown(f'<div class="section-header">By {dimension.replace("_", " ").title()}</div>', unsafe_allow_html=True)
+        dimension_df = pd.DataFrame(summary["breakdown"][dimension], columns=["Value", "Category", "Customers"])
+        if dimension_df.empty:
+            continue
+        pivot_df = dimension_df.pivot_table(index="Value", columns="Category", values="Customers", aggfunc="sum", fill_value=0)
+        pivot_df = pivot_df.reindex(columns=[c for c in ["Low Risk", "Medium Risk", "High Risk"] if c in pivot_df.columns])
+        st.bar_chart(pivot_df)
+        st.dataframe(pivot_df, use_container_width=True)
+    st.stop()
 
 # Initialize session state
 if 'selected_customer_id' not in st.session_state:
@@ -260,8 +315,8 @@ if "customers_df" in locals() and not customers_df.empty:
         # Show selected customer details
         if st.session_state.selected_customer_id:
             customer_matches = filtered_df[filtered_df['cid'] == st.session_state.selected_customer_id]
-            if not customer_matches.empty:
-                selected_customer = customer_matches.iloc[0]
+            selected_customer = fetch_customer_details(st.session_state.selected_customer_id) if not customer_matches.empty else None
+            if selected_customer:
                 
                 st.markdown('<div class="section-header">Customer Details</div>', unsafe_allow_html=True)
                 col1, col2 = st.columns(2)
@@ -310,9 +365,11 @@ if "customers_df" in locals() and not customers_df.empty:
                 # Risk calculation buttons
                 st.markdown('<div class="section-header">Risk Assessment Options</div>', unsafe_allow_html=True)
                 col_btn1, col_btn2 = st.columns(2)
+                structured_clicked = False
                 with col_btn1:
                     if st.button("Calculate Structured Risk", key="struct_btn"):
                         st.session_state.risk_display = "structured"
+                        structured_clicked = True
                 with col_btn2:
                     if st.button("Calculate Unstructured Risk", key="unstruct_btn"):
                         st.session_state.risk_display = "unstructured"
@@ -321,8 +378,11 @@ if "customers_df" in locals() and not customers_df.empty:
                 if st.session_state.risk_display:
                     st.markdown('<div class="section-header">Risk Assessment</div>', unsafe_allow_html=True)
                     if st.session_state.risk_display == "structured":
-                        base_score = predict_risk(selected_customer, xgb_model, encoders)
+                        base_score = predict_risk(selected_customer, get_model())
                         risk_category, risk_color = get_risk_category(base_score, max_score=375)
+                        # Store the score only on the click itself, not on every later rerun while it is displayed
+                        if structured_clicked:
+                            record_customer_scores([(selected_customer["cid"], selected_customer, base_score, risk_category)], MODEL_VERSION)
                         st.markdown(f"""
                         <div class="card">
                             <p>Structured Risk Score (XGBoost): <strong style="font-size: 1.5rem; color: {risk_color}">{base_score:.1f}</strong> / 375</p>
@@ -333,7 +393,7 @@ if "customers_df" in locals() and not customers_df.empty:
                         </div>
                         """, unsafe_allow_html=True)
                     elif st.session_state.risk_display == "unstructured":
-                        base_score = predict_risk(selected_customer, xgb_model, encoders)
+                        base_score = predict_risk(selected_customer, get_model())
                         adjustment, explanation = get_llm_risk_adjustment(selected_customer['income_comments'] or "No comments provided.")
                         total_score = base_score + adjustment
                         risk_category, risk_color = get_risk_category(total_score, max_score=425)
@@ -0,0 +1,123 @@
+import sqlite3
+
+# Database path
+DB_PATH = "bank_onboarding.db"
+
+# Default number of changes handed to a consumer per read
+DEFAULT_BATCH_SIZE = 500
+
+# Local ISO timestamp matching the created_at/updated_at format written by onboard.py
+CHANGED_AT_SQL = "strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')"
+
+# Function to create the change log, consumer offsets and customers triggers
+def init_changefeed_tables(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS customer_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            cid TEXT,
+            op TEXT,
+            changed_at TEXT
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS change_consumers (
+            consumer TEXT PRIMARY KEY,
+            last_seq INTEGER,
+            updated_at TEXT
+        )
+    """)
+
+    # Triggers can only be attached once the customers table exists (created by onboard.py)
+    cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'customers'")
+    if cur.fetchone() is None:
+        return
+
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS customers_change_insert AFTER INSERT ON customers
+        BEGIN
+            INSERT INTO customer_changes (cid, op, changed_at) VALUES (NEW.cid, 'insert', {CHANGED_AT_SQL});
+        END
+    """)
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS customers_change_update AFTER UPDATE ON customers
+        BEGIN
+            INSERT INTO customer_changes (cid, op, changed_at) VALUES (NEW.cid, 'update', {CHANGED_AT_SQL});
+        END
+    """)
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS customers_change_delete AFTER DELETE ON customers
+        BEGIN
+            INSERT INTO customer_changes (cid, op, changed_at) VALUES (OLD.cid, 'delete', {CHANGED_AT_SQL});
+        END
+    """)
+
+    # Seed an empty log with the existing customers so consumers starting at 0 see the whole book
+    cur.execute("SELECT 1 FROM customer_changes LIMIT 1")
+    if cur.fetchone() is None:
+        cur.execute(f"""
+            INSERT INTO customer_changes (cid, op, changed_at)
+            SELECT cid, 'insert', COALESCE(created_at, {CHANGED_AT_SQL}) FROM customers ORDER BY created_at
+        """)
+
+# Last sequence number a consumer has processed (0 if it has never committed)
+def get_offset(cur, consumer):
+    cur.execute("SELECT last_seq FROM change_consumers WHERE consumer = ?", (consumer,))
+    row = cur.fetchone()
+    return row[0] if row else 0
+
+# Store a consumer's offset on the caller's cursor, so it commits together with the consumer's own writes
+def commit_offset(cur, consumer, seq):
+    cur.execute(f"""
+        INSERT INTO change_consumers (consumer, last_seq, updated_at) VALUES (?, ?, {CHANGED_AT_SQL})
+        ON CONFLICT (consumer) DO UPDATE SET last_seq = excluded.last_seq, updated_at = excluded.updated_at
+    """, (consumer, seq))
+
+# Fetch the next batch of changes after a consumer's stored offset on the caller's cursor, oldest first
+def fetch_changes(cur, consumer, limit=DEFAULT_BATCH_SIZE):
+    cur.execute("""
+        SELECT seq, cid, op, changed_at
+        FROM customer_changes
+        WHERE seq > ?
+        ORDER BY seq
+        LIMIT ?
+    """, (get_offset(cur, consumer), limit))
+    return [dict(zip(["seq", "cid", "op", "changed_at"], row)) for row in cur.fetchall()]
+
+# Read the next batch of changes in its own connection, without locking or advancing the offset.
+# The tables are created by init_changefeed_tables (called from init_db / init_portfolio_db).
+def read_changes(consumer, limit=DEFAULT_BATCH_SIZE):
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+    changes = fetch_changes(cur, consumer, limit)
+    cur.close()
+    conn.close()
+    return changes
+
+# Process the changes after a consumer's stored offset, one batch per transaction; returns the number applied.
+# Each batch is re-read under BEGIN IMMEDIATE and passed to apply_batch(cur, changes), whose writes commit
+# together with the new offset, so concurrent consumers never apply a batch twice or move the offset back.
+def consume_changes(consumer, apply_batch, batch_size=DEFAULT_BATCH_SIZE):
+    applied = 0
+    # Cheap unlocked check so an up-to-date consumer never takes the write lock
+    while read_changes(consumer, 1):
+        conn = sqlite3.connect(DB_PATH)
+        conn.row_factory = sqlite3.Row
+        cur = conn.cursor()
+        try:
+            cur.execute("BEGIN IMMEDIATE")
+            changes = fetch_changes(cur, consumer, batch_size)
+            if not changes:
+                # Another worker committed past our offset while we waited for the lock
+                conn.rollback()
+                break
+            apply_batch(cur, changes)
+            commit_offset(cur, consumer, changes[-1]["seq"])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+            conn.close()
+        applied += len(changes)
+    return applied
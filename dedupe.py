@@ -0,0 +1,203 @@
+import random
+import re
+import sqlite3
+import zlib
+from difflib import SequenceMatcher
+from changefeed import DEFAULT_BATCH_SIZE, consume_changes
+
+# Database path
+DB_PATH = "bank_onboarding.db"
+
+# Change feed consumer that keeps the duplicate index in sync with the customers table
+INDEX_CONSUMER = "duplicate_index"
+
+# MinHash signature length, split into LSH bands of MINHASH_ROWS values each.
+# 16 bands of 4 rows make records with roughly 50% n-gram overlap likely to share a band.
+MINHASH_PERMUTATIONS = 64
+MINHASH_ROWS = 4
+SHINGLE_SIZE = 3
+
+# Estimated n-gram similarity above which a candidate is reported as a likely duplicate
+SIMILARITY_THRESHOLD = 0.5
+
+# Name similarity above which a phonetic match is reported as a likely duplicate
+NAME_SIMILARITY_THRESHOLD = 0.85
+
+# Fixed hash coefficients so stored signatures stay comparable across processes
+_PRIME = (1 << 61) - 1
+_rng = random.Random(42)
+_HASH_COEFFICIENTS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(MINHASH_PERMUTATIONS)]
+
+# Soundex digit for each consonant; vowels, h, w and y have none
+_SOUNDEX_CODES = {
+    **dict.fromkeys("bfpv", "1"), **dict.fromkeys("cgjkqsxz", "2"), **dict.fromkeys("dt", "3"),
+    "l": "4", **dict.fromkeys("mn", "5"), "r": "6"
+}
+
+# Function to create the duplicate index tables
+def init_dedupe_tables(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS customer_name_keys (
+            cid TEXT PRIMARY KEY,
+            name_key TEXT,
+            name_norm TEXT,
+            address_norm TEXT,
+            signature TEXT
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_customer_name_keys_key ON customer_name_keys (name_key)")
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS customer_minhash_bands (
+            band INTEGER,
+            bucket TEXT,
+            cid TEXT,
+            PRIMARY KEY (band, bucket, cid)
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_customer_minhash_bands_cid ON customer_minhash_bands (cid)")
+
+# Lowercase and strip punctuation so formatting differences do not matter
+def normalize(text):
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", str(text or "").lower()).split())
+
+# American Soundex code of a single word (e.g. "Robert" and "Rupert" both give "R163")
+def soundex(word):
+    letters = [c for c in normalize(word) if c.isalpha()]
+    if not letters:
+        return ""
+    code = letters[0].upper()
+    previous = _SOUNDEX_CODES.get(letters[0], "")
+    for c in letters[1:]:
+        digit = _SOUNDEX_CODES.get(c, "")
+        if digit and digit != previous:
+            code += digit
+        if c not in "hw":
+            previous = digit
+    return (code + "000")[:4]
+
+# Phonetic blocking key for a customer name
+def name_key(first_name, surname):
+    return f"{soundex(surname)}:{soundex(first_name)}"
+
+# Character n-grams of a normalized string
+def shingles(text, size=SHINGLE_SIZE):
+    text = f" {text} "
+    return {text[i:i + size] for i in range(max(len(text) - size + 1, 1))}
+
+# MinHash signature over the name and address n-grams
+def minhash_signature(name_norm, address_norm):
+    hashes = [zlib.crc32(s.encode()) for s in shingles(name_norm) | {f"@{s}" for s in shingles(address_norm)}]
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _HASH_COEFFICIENTS]
+
+# Split a signature into LSH band buckets
+def band_buckets(signature):
+    return [
+        (band, ",".join(str(v) for v in signature[start:start + MINHASH_ROWS]))
+        for band, start in enumerate(range(0, MINHASH_PERMUTATIONS, MINHASH_ROWS))
+    ]
+
+# Estimated Jaccard similarity of two signatures
+def signature_similarity(a, b):
+    return sum(x == y for x, y in zip(a, b)) / MINHASH_PERMUTATIONS
+
+# Normalized name, address, phonetic key and signature for a customer record
+def _customer_keys(customer):
+    name_norm = normalize(f"{customer['first_name']} {customer['surname']}")
+    address_norm = normalize(" ".join(
+        str(customer.get(field) or "") for field in ["street_address", "city", "state", "postal_code"]
+    ))
+    signature = minhash_signature(name_norm, address_norm)
+    return name_norm, address_norm, name_key(customer["first_name"], customer["surname"]), signature
+
+# Remove a customer from the index on the caller's cursor
+def _unindex_customer(cur, cid):
+    cur.execute("DELETE FROM customer_name_keys WHERE cid = ?", (cid,))
+    cur.execute("DELETE FROM customer_minhash_bands WHERE cid = ?", (cid,))
+
+# Add or refresh a customer in the index on the caller's cursor
+def _index_customer(cur, customer):
+    cid = str(customer["cid"])
+    _unindex_customer(cur, cid)
+    name_norm, address_norm, key, signature = _customer_keys(customer)
+    cur.execute(
+        "INSERT INTO customer_name_keys (cid, name_key, name_norm, address_norm, signature) VALUES (?, ?, ?, ?, ?)",
+        (cid, key, name_norm, address_norm, ",".join(str(v) for v in signature))
+    )
+    cur.executemany(
+        "INSERT INTO customer_minhash_bands (band, bucket, cid) VALUES (?, ?, ?)",
+        [(band, bucket, cid) for band, bucket in band_buckets(signature)]
+    )
+
+# Re-index the customers in a batch of changes on the caller's cursor; deleted customers are unindexed
+def _apply_index_changes(cur, changes):
+    cids = list(dict.fromkeys(change["cid"] for change in changes))
+    init_dedupe_tables(cur)
+    cur.execute(f"""
+        SELECT cid, first_name, surname, street_address, city, state, postal_code
+        FROM customers
+        WHERE cid IN ({", ".join("?" * len(cids))})
+    """, cids)
+    customers = {row["cid"]: dict(row) for row in cur.fetchall()}
+    for cid in cids:
+        if cid in customers:
+            _index_customer(cur, customers[cid])
+        else:
+            _unindex_customer(cur, cid)
+
+# Apply customer changes since the index's last offset; returns the number of changes applied
+def sync_duplicate_index(batch_size=DEFAULT_BATCH_SIZE):
+    return consume_changes(INDEX_CONSUMER, _apply_index_changes, batch_size)
+
+# Check an onboarding submission against existing customers before it is saved.
+# candidate needs cid, first_name, surname and the address fields. Only customers sharing
+# the phonetic name key or a MinHash band are compared, so the check does not scan the book.
+# Returns matches sorted by similarity, each with a reason:
+#   "id_collision"   - the generated customer ID already exists and saving would overwrite it
+#   "same_name"      - an existing customer has the same normalized name
+#   "similar_record" - name and address n-grams overlap above SIMILARITY_THRESHOLD
+#   "similar_name"   - the name sounds alike and is spelled similarly
+def find_duplicates(candidate):
+    sync_duplicate_index()
+    name_norm, address_norm, key, signature = _customer_keys(candidate)
+    candidate_cid = str(candidate.get("cid") or "")
+
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+    init_dedupe_tables(cur)
+    buckets = band_buckets(signature)
+    cur.execute(f"""
+        SELECT k.cid, k.name_norm, k.address_norm, k.signature, c.first_name, c.surname,
+               c.street_address, c.city, c.state, c.postal_code
+        FROM customer_name_keys k
+        JOIN customers c ON c.cid = k.cid
+        WHERE k.cid = ? OR k.name_key = ? OR k.cid IN (
+            SELECT cid FROM customer_minhash_bands
+            WHERE {" OR ".join("(band = ? AND bucket = ?)" for _ in buckets)}
+        )
+    """, [candidate_cid, key] + [value for bucket in buckets for value in bucket])
+    rows = cur.fetchall()
+    cur.close()
+    conn.close()
+
+    matches = []
+    for cid, other_name, other_address, other_signature, first_name, surname, street, city, state, postal_code in rows:
+        similarity = signature_similarity(signature, [int(v) for v in other_signature.split(",")])
+        if cid == candidate_cid:
+            reason = "id_collision"
+        elif other_name == name_norm:
+            reason = "same_name"
+        elif similarity >= SIMILARITY_THRESHOLD:
+            reason = "similar_record"
+        elif SequenceMatcher(None, name_norm, other_name).ratio() >= NAME_SIMILARITY_THRESHOLD:
+            reason = "similar_name"
+        else:
+            continue
+        matches.append({
+            "cid": cid,
+            "name": f"{first_name} {surname}",
+            "address": f"{street}, {city}, {state} {postal_code}",
+            "same_address": other_address == address_norm,
+            "similarity": similarity,
+            "reason": reason,
+        })
+    return sorted(matches, key=lambda m: (m["reason"] != "id_collision", -m["similarity"]))
@@ -1,6 +1,4 @@
 import streamlit as st
-import pdfplumber
-from PIL import Image
 import io
 import os
 import sqlite3
@@ -9,6 +7,9 @@ import requests
 import base64
 import json
 import hashlib
+from portfolio import init_portfolio_tables
+from changefeed import init_changefeed_tables
+from dedupe import init_dedupe_tables, find_duplicates
 
 # Database file path
 DB_PATH = "bank_onboarding.db"
@@ -25,6 +26,30 @@ OLLAMA_API_URL = "http://localhost:11434/api/generate"
 def generate_customer_id(first_name, surname):
     return hashlib.md5((first_name + surname).encode()).hexdigest()[:8]
 
+# Function to check whether a customer ID is already in use
+def customer_exists(cid):
+    conn = sqlite3.connect(DB_PATH)
+    row = conn.execute("SELECT 1 FROM customers WHERE cid = ?", (cid,)).fetchone()
+    conn.close()
+    return row is not None
+
+# Function to generate an unused customer ID for a new customer whose name collides with an existing one
+def generate_unique_customer_id(first_name, surname):
+    suffix = 1
+    while True:
+        cid = hashlib.md5(f"{first_name}{surname}#{suffix}".encode()).hexdigest()[:8]
+        if not customer_exists(cid):
+            return cid
+        suffix += 1
+
+# Labels for the reasons returned by find_duplicates
+DUPLICATE_REASONS = {
+    "id_collision": "same customer ID",
+    "same_name": "same name",
+    "similar_record": "similar name and address",
+    "similar_name": "similar name"
+}
+
 # Function to save file to disk and return its path
 def save_uploaded_file(uploaded_file, customer_id, doc_type):
     file_ext = uploaded_file.name.split(".")[-1]
@@ -57,7 +82,8 @@ def init_db():
             expected_transaction_volume TEXT,
             file_paths TEXT,
             descriptions TEXT,
-            created_at TEXT
+            created_at TEXT,
+            updated_at TEXT
         )
     """)
     
@@ -67,11 +93,17 @@ def init_db():
         "cid", "first_name", "surname", "residence_country", "customer_type",
         "occupation", "time_at_address", "street_address", "city", "state",
         "postal_code", "income_source", "income_comments", "expected_transaction_volume",
-        "file_paths", "descriptions", "created_at"
+        "file_paths", "descriptions", "created_at", "updated_at"
     ]
     for col in expected_columns:
         if col not in columns:
             cur.execute(f"ALTER TABLE customers ADD COLUMN {col} TEXT")
+    # Rows saved before updated_at existed were last updated when they were created
+    cur.execute("UPDATE customers SET updated_at = created_at WHERE updated_at IS NULL")
+    
+    init_portfolio_tables(cur)
+    init_changefeed_tables(cur)
+    init_dedupe_tables(cur)
     
     conn.commit()
     cur.close()
@@ -80,6 +112,7 @@ def init_db():
 # Function to save customer data to database with file paths and descriptions
 def save_customer(customer, file_paths, descriptions):
     try:
+        now = datetime.now().isoformat()
         values = (
             str(customer["CID"]),
             str(customer["First Name"]),
@@ -97,18 +130,37 @@ def save_customer(customer, file_paths, descriptions):
             str(customer["Expected Transaction Volume"]),
             ",".join([str(fp) for fp in file_paths]) if file_paths else "",
             ",".join([str(desc) for desc in descriptions]) if descriptions else "",
-            datetime.now().isoformat()
+            now,
+            now
         )
         
         conn = sqlite3.connect(DB_PATH)
         cur = conn.cursor()
+        # Upsert so an existing record keeps its created_at and the change feed logs an update
         cur.execute("""
-            INSERT OR REPLACE INTO customers (
+            INSERT INTO customers (
                 cid, first_name, surname, residence_country, customer_type,
                 occupation, time_at_address, street_address, city, state,
                 postal_code, income_source, income_comments, expected_transaction_volume,
-                file_paths, descriptions, created_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                file_paths, descriptions, created_at, updated_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (cid) DO UPDATE SET
+                first_name = excluded.first_name,
+                surname = excluded.surname,
+                residence_country = excluded.residence_country,
+                customer_type = excluded.customer_type,
+                occupation = excluded.occupation,
+                time_at_address = excluded.time_at_address,
+                street_address = excluded.street_address,
+                city = excluded.city,
+                state = excluded.state,
+                postal_code = excluded.postal_code,
+                income_source = excluded.income_source,
+                income_comments = excluded.income_comments,
+                expected_transaction_volume = excluded.expected_transaction_volume,
+                file_paths = excluded.file_paths,
+                descriptions = excluded.descriptions,
+                updated_at = excluded.updated_at
         """, values)
         conn.commit()
         cur.close()
@@ -163,6 +215,10 @@ def validate_image_with_ollama(image):
 
 # Function to extract images from PDF and validate them
 def validate_pdf_with_ollama(pdf_file):
+    # Deferred imports: only needed when a PDF is uploaded
+    import pdfplumber
+    from PIL import Image
+
     try:
         doc_types = []
         descriptions = []
@@ -279,6 +335,41 @@ with tab1:
         income_comments = st.text_area("Additional Comments on Source of Income", "Customer claims income from freelance work and occasional consulting.")
         expected_transaction_volume = st.selectbox("Expected Monthly Transaction Volume", ["Less than $5,000", "$5,000 - $20,000", "$20,000 - $50,000", "More than $50,000"], index=1)
 
+    st.markdown("<div class='section-header'>Duplicate Check</div>", unsafe_allow_html=True)
+    with st.container(border=True):
+        customer_id = generate_customer_id(first_name, surname)
+        duplicates = find_duplicates({
+            "cid": customer_id,
+            "first_name": first_name,
+            "surname": surname,
+            "street_address": street_address,
+            "city": city,
+            "state": state,
+            "postal_code": postal_code
+        })
+        collision = next((match for match in duplicates if match["reason"] == "id_collision"), None)
+        # No default: uploads and submission wait for an explicit choice, so a new customer
+        # can never overwrite another customer's record or documents by accident
+        id_confirmed = True
+        if collision:
+            id_choice = st.radio(
+                f"Customer ID {customer_id} already belongs to {collision['name']} ({collision['address']})",
+                ["Update existing customer", "Create new customer"],
+                index=None
+            )
+            id_confirmed = id_choice is not None
+            if id_choice == "Create new customer":
+                customer_id = generate_unique_customer_id(first_name, surname)
+        if duplicates:
+            st.warning(f"Found {len(duplicates)} possible duplicate(s) of this customer:")
+            for match in duplicates:
+                same_address = ", same address" if match["same_address"] else ""
+                st.markdown(f"- **{match['name']}** (ID {match['cid']}), {match['address']}: {DUPLICATE_REASONS[match['reason']]}, {match['similarity']:.0%} similar{same_address}")
+            duplicates_reviewed = st.checkbox("I have reviewed the possible duplicates")
+        else:
+            st.success("No existing customer matches this name and address.")
+            duplicates_reviewed = True
+
 with tab2:
     st.markdown("<div class='section-header'>Document Upload</div>", unsafe_allow_html=True)
     st.markdown("<p class='info-text'>Upload identification and income verification documents (images or PDFs).</p>", unsafe_allow_html=True)
@@ -296,12 +387,15 @@ with tab2:
             help="Upload images or PDFs of your identification and income verification documents"
         )
 
-        customer_id = generate_customer_id(first_name, surname)
         file_paths = []
         documents_identified = []
         descriptions = []
 
-        if uploaded_files:
+        if uploaded_files and not id_confirmed:
+            st.warning(f"Customer ID {customer_id} is already in use. Choose whether to update that customer or create a new one in the Customer Information tab before uploading documents.")
+        elif uploaded_files:
+            from PIL import Image  # Deferred: only needed once documents are uploaded
+
             for uploaded_file in uploaded_files:
                 if uploaded_file.type in ["image/png", "image/jpg", "image/jpeg"]:
                     image = Image.open(uploaded_file)
@@ -339,7 +433,12 @@ with tab2:
 st.markdown("<div class='section-header'></div>", unsafe_allow_html=True)
 col1, col2, col3 = st.columns([1, 2, 1])
 with col2:
-    if st.button("SUBMIT APPLICATION", use_container_width=True):
+    submitted = st.button("SUBMIT APPLICATION", use_container_width=True)
+    if submitted and not id_confirmed:
+        st.error("Please choose whether to update the existing customer or create a new one in the Customer Information tab before submitting.")
+    elif submitted and not duplicates_reviewed:
+        st.error("Please review the possible duplicates in the Customer Information tab before submitting.")
+    elif submitted:
         customer = {
             "CID": customer_id,
             "First Name": first_name,
@@ -0,0 +1,193 @@
+import sqlite3
+from datetime import datetime
+from changefeed import DEFAULT_BATCH_SIZE, init_changefeed_tables, consume_changes
+
+# Database path
+DB_PATH = "bank_onboarding.db"
+
+# Customer fields the portfolio summary is broken down by
+DIMENSIONS = ["residence_country", "customer_type", "occupation"]
+
+# Width of each score histogram bucket (structured scores run 0 to 375)
+SCORE_BUCKET_WIDTH = 25
+MAX_SCORE = 375
+
+# Function to create the score and aggregate tables
+def init_portfolio_tables(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS customer_scores (
+            cid TEXT PRIMARY KEY,
+            residence_country TEXT,
+            customer_type TEXT,
+            occupation TEXT,
+            risk_score REAL,
+            risk_category TEXT,
+            score_bucket INTEGER,
+            model_version TEXT,
+            scored_at TEXT
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS risk_aggregates (
+            dimension TEXT,
+            value TEXT,
+            risk_category TEXT,
+            customer_count INTEGER,
+            PRIMARY KEY (dimension, value, risk_category)
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS score_histogram (
+            score_bucket INTEGER PRIMARY KEY,
+            customer_count INTEGER
+        )
+    """)
+
+# Function to initialize the portfolio tables, and the change feed they are fed from, in their own connection
+def init_portfolio_db():
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+    init_portfolio_tables(cur)
+    init_changefeed_tables(cur)
+    conn.commit()
+    cur.close()
+    conn.close()
+
+# Map a score to the start of its histogram bucket
+def get_score_bucket(score):
+    score = min(max(float(score), 0), MAX_SCORE - 1)
+    return int(score // SCORE_BUCKET_WIDTH) * SCORE_BUCKET_WIDTH
+
+# Add (delta=1) or remove (delta=-1) one customer's contribution to the aggregates
+def _adjust_aggregates(cur, dims, risk_category, score_bucket, delta):
+    for dimension in DIMENSIONS:
+        cur.execute("""
+            INSERT INTO risk_aggregates (dimension, value, risk_category, customer_count)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (dimension, value, risk_category)
+            DO UPDATE SET customer_count = customer_count + excluded.customer_count
+        """, (dimension, dims[dimension], risk_category, delta))
+    cur.execute("""
+        INSERT INTO score_histogram (score_bucket, customer_count) VALUES (?, ?)
+        ON CONFLICT (score_bucket)
+        DO UPDATE SET customer_count = customer_count + excluded.customer_count
+    """, (score_bucket, delta))
+
+# Remove a customer's stored score and its aggregate contribution, if any.
+# Runs on the caller's cursor so it shares the caller's transaction; the caller must already
+# hold the write lock (BEGIN IMMEDIATE), otherwise another writer can change the row between
+# this read and the writes and the aggregates drift.
+def retract_customer_score(cur, cid):
+    cur.execute(
+        "SELECT residence_country, customer_type, occupation, risk_category, score_bucket "
+        "FROM customer_scores WHERE cid = ?",
+        (cid,)
+    )
+    row = cur.fetchone()
+    if row is None:
+        return False
+    dims = dict(zip(DIMENSIONS, row[:3]))
+    _adjust_aggregates(cur, dims, row[3], row[4], -1)
+    cur.execute("DELETE FROM customer_scores WHERE cid = ?", (cid,))
+    return True
+
+# Store scores on the caller's cursor and update the aggregates incrementally.
+# Each entry is (cid, customer, score, risk_category); customer needs the DIMENSIONS fields.
+def _record_scores(cur, scores, model_version):
+    scored_at = datetime.now().isoformat()
+    for cid, customer, score, risk_category in scores:
+        cid = str(cid)
+        retract_customer_score(cur, cid)
+        dims = {dimension: str(customer[dimension]) for dimension in DIMENSIONS}
+        score_bucket = get_score_bucket(score)
+        cur.execute("""
+            INSERT INTO customer_scores (
+                cid, residence_country, customer_type, occupation,
+                risk_score, risk_category, score_bucket, model_version, scored_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            cid, dims["residence_country"], dims["customer_type"], dims["occupation"],
+            float(score), risk_category, score_bucket, model_version, scored_at
+        ))
+        _adjust_aggregates(cur, dims, risk_category, score_bucket, 1)
+
+# Store scores for a batch of customers in their own transaction
+def record_customer_scores(scores, model_version):
+    if not scores:
+        return 0
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+    cur.execute("BEGIN IMMEDIATE")
+    init_portfolio_tables(cur)
+    _record_scores(cur, scores, model_version)
+    conn.commit()
+    cur.close()
+    conn.close()
+    return len(scores)
+
+# Change feed consumer name for the scoring job; a new model version starts a new
+# consumer at offset 0, so the whole book is rescored through the feed
+def scoring_consumer(model_version):
+    return f"portfolio_scoring:{model_version}"
+
+# Score customers that changed since the scoring job's last offset and update the aggregates.
+# score_customers takes a list of customer dicts and returns a (score, risk_category) per customer.
+# Scores, retractions for deleted customers and the new offset commit together (see consume_changes).
+# Returns the number of customers scored.
+def update_scores_from_feed(model_version, score_customers, batch_size=DEFAULT_BATCH_SIZE):
+    processed = 0
+
+    def apply_batch(cur, changes):
+        nonlocal processed
+        cids = list(dict.fromkeys(change["cid"] for change in changes))
+        cur.execute(f"""
+            SELECT cid, residence_country, customer_type, occupation, time_at_address, income_source
+            FROM customers
+            WHERE cid IN ({", ".join("?" * len(cids))})
+        """, cids)
+        customers = [dict(row) for row in cur.fetchall()]
+        found = {customer["cid"] for customer in customers}
+
+        if customers:
+            results = score_customers(customers)
+            _record_scores(
+                cur,
+                [(customer["cid"], customer, score, risk_category) for customer, (score, risk_category) in zip(customers, results)],
+                model_version
+            )
+        for cid in cids:
+            if cid not in found:
+                retract_customer_score(cur, cid)
+        processed += len(customers)
+
+    consume_changes(scoring_consumer(model_version), apply_batch, batch_size)
+    return processed
+
+# Read the precomputed aggregates; never touches the customers table
+def fetch_portfolio_summary():
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+    init_portfolio_tables(cur)
+    cur.execute("""
+        SELECT dimension, value, risk_category, customer_count
+        FROM risk_aggregates
+        WHERE customer_count > 0
+        ORDER BY dimension, value, risk_category
+    """)
+    breakdown = {dimension: [] for dimension in DIMENSIONS}
+    for dimension, value, risk_category, customer_count in cur.fetchall():
+        breakdown.setdefault(dimension, []).append((value, risk_category, customer_count))
+    cur.execute("""
+        SELECT score_bucket, customer_count
+        FROM score_histogram
+        WHERE customer_count > 0
+        ORDER BY score_bucket
+    """)
+    histogram = cur.fetchall()
+    cur.close()
+    conn.close()
+    return {
+        "breakdown": breakdown,
+        "histogram": histogram,
+        "total": sum(count for _, count in histogram),
+    }
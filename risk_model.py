@@ -0,0 +1,71 @@
+import os
+import numpy as np
+import pandas as pd
+
+# Version tag stored with each score; bump when the model changes so stored scores get refreshed
+MODEL_VERSION = "xgb-native-cat-v1"
+
+# Trained model artifact, reused across app restarts instead of retraining
+MODEL_PATH = f"risk_model_{MODEL_VERSION}.json"
+
+# Known values for each model feature (matches the onboarding form options)
+FEATURE_CATEGORIES = {
+    "residence_country": ["Australia (AUS)", "United States (USA)", "China (CHN)", "Russia (RUS)", "Offshore Financial Center (OFF)"],
+    "customer_type": ["Individual", "Company", "Trust", "Partnership"],
+    "occupation": ["Engineer/Technical", "Retail/Cashier", "Government/Political", "Self-employed", "Finance/Banking", "Other/Unknown"],
+    "time_at_address": ["Less than 1 year", "1-3 years", "3-5 years", "More than 5 years"],
+    "income_source": ["Employment", "Business", "Investments", "Inheritance/Gift", "Retirement/Pension", "Other"]
+}
+
+# Features used by the XGBoost model
+MODEL_FEATURES = list(FEATURE_CATEGORIES)
+
+# Convert feature columns to the fixed categorical dtypes the model was trained on.
+# Values outside the known categories become missing instead of raising.
+def to_model_frame(df):
+    return pd.DataFrame({
+        col: df[col].astype(pd.CategoricalDtype(FEATURE_CATEGORIES[col]))
+        for col in MODEL_FEATURES
+    })
+
+# Synthetic training data for XGBoost
+def create_synthetic_data():
+    np.random.seed(42)
+    data = {col: np.random.choice(values, 100) for col, values in FEATURE_CATEGORIES.items()}
+    data["Risk_Score"] = np.random.uniform(0, 375, 100)
+    return pd.DataFrame(data)
+
+# Train XGBoost model (native categorical support, no label encoders needed)
+def train_xgboost():
+    import xgboost as xgb
+
+    df = create_synthetic_data()
+    X = to_model_frame(df)
+    y = df["Risk_Score"]
+
+    model = xgb.XGBRegressor(objective="reg:squarederror", tree_method="hist", enable_categorical=True, random_state=42)
+    model.fit(X, y)
+    return model
+
+# Load the model artifact, training and saving it first if it does not exist yet
+def load_model(model_path=MODEL_PATH):
+    import xgboost as xgb
+
+    if os.path.exists(model_path):
+        model = xgb.XGBRegressor()
+        model.load_model(model_path)
+        return model
+
+    model = train_xgboost()
+    # Write to a temporary file first so a concurrent worker never reads a partial artifact
+    # (keeping the extension, which XGBoost uses to pick the serialization format)
+    root, ext = os.path.splitext(model_path)
+    tmp_path = f"{root}.{os.getpid()}.tmp{ext}"
+    model.save_model(tmp_path)
+    os.replace(tmp_path, model_path)
+    return model
+
+# Predict risk score (XGBoost)
+def predict_risk(customer, model):
+    X = to_model_frame(pd.DataFrame({col: [customer[col]] for col in MODEL_FEATURES}))
+    return model.predict(X)[0]
@@ -0,0 +1,44 @@
+import argparse
+import time
+import requests
+from risk_model import MODEL_PATH, load_model
+
+# Ollama API endpoint
+OLLAMA_API = "http://localhost:11434/api/generate"
+
+# Models used by onboard.py (document validation) and cdd.py (income risk adjustment)
+OLLAMA_MODELS = ["llava:7b", "granite3.2:latest"]
+
+# How long Ollama keeps a warmed model in memory
+KEEP_ALIVE = "30m"
+
+# Make sure the model artifact exists (training it if needed) and load it once
+def warm_risk_model():
+    start = time.perf_counter()
+    load_model()
+    return time.perf_counter() - start
+
+# Ask Ollama to load a model into memory; a request without a prompt only loads the model
+def warm_ollama_model(model):
+    start = time.perf_counter()
+    try:
+        response = requests.post(OLLAMA_API, json={"model": model, "keep_alive": KEEP_ALIVE}, timeout=200)
+        response.raise_for_status()
+        return True, time.perf_counter() - start, "loaded"
+    except requests.exceptions.ConnectionError:
+        return False, time.perf_counter() - start, "Cannot connect to Ollama at localhost:11434. Ensure 'ollama serve' is running."
+    except requests.exceptions.HTTPError as e:
+        return False, time.perf_counter() - start, f"HTTP {e.response.status_code} - {e.response.text}"
+    except Exception as e:
+        return False, time.perf_counter() - start, f"Unexpected issue - {str(e)}"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Preload the risk model artifact and Ollama models before serving")
+    parser.add_argument("--skip-ollama", action="store_true", help="only prepare the risk model artifact")
+    args = parser.parse_args()
+
+    print(f"Risk model ({MODEL_PATH}): ready in {warm_risk_model():.2f}s")
+    if not args.skip_ollama:
+        for model in OLLAMA_MODELS:
+            ok, elapsed, message = warm_ollama_model(model)
+            print(f"Ollama {model}: {message} ({elapsed:.2f}s)")